@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
 
+import functools
+import itertools
 import os
 import re
-import time
-import signal
+import subprocess
+from collections import Counter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 import util
 
 """
@@ -14,15 +22,40 @@ regards to a given correct output file. In general, the checkers return 'AC',
 """
 
 
+#############################################################################
+# precompiled regular expressions
+#############################################################################
+
+# Compiled once at module load to avoid the per-call lookup in the re cache.
+
+_ENDS_WS_RE = re.compile(r'.*\s', re.DOTALL)
+
+
 #############################################################################
 # normalization
 #############################################################################
 
 
+@functools.lru_cache(maxsize=8192)
 def normalization(s):
     """Returns an string that is the normalitzation of the string s."""
 
-    return re.sub(r'\s+', ' ', s).strip().upper()
+    # str.split() collapses whitespace runs and drops the leading and
+    # trailing ones, so this is the regex substitution plus strip in one
+    # C-level pass.
+    return ' '.join(s.split()).upper()
+
+
+def _normalize_all(items):
+    """Returns the list of normalizations of the strings in items.
+
+    The items are uppercased as one blob joined with a \\x01 sentinel
+    (a character that valid output can never contain), so the N
+    Python-level calls become a single C call plus the per-item
+    whitespace collapse."""
+
+    blob = '\x01'.join(items).upper()
+    return [' '.join(p.split()) for p in blob.split('\x01')]
 
 
 #############################################################################
@@ -30,13 +63,96 @@ def normalization(s):
 #############################################################################
 
 
+# Valid characters are those in [32..126] plus \n, \r and \t.
+_VALID_BYTES = bytes(range(32, 127)) + b'\n\r\t'
+
+
 def invalid_characters(s):
-    """Returns true if s contains some invalid character."""
+    """Returns true if s (a str or bytes) contains some invalid character."""
+
+    # The check runs on bytes: deleting all valid bytes in one C-level
+    # translate pass leaves something only if an invalid one was there.
+    # Non-ASCII text is invalid by definition.
+    if isinstance(s, str):
+        if not s.isascii():
+            return True
+        s = s.encode('ascii')
+    return bool(s.translate(None, delete=_VALID_BYTES))
+
+
+def _make_scan_table():
+    # Maps every ASCII character for a single translate pass: invalid
+    # characters become a \x00 sentinel, valid whitespace becomes a plain
+    # space, and letters are uppercased.
+    table = {}
+    for c in range(128):
+        if c in _VALID_BYTES:
+            ch = chr(c)
+            if ch in '\n\r\t':
+                table[c] = ' '
+            elif ch.islower():
+                table[c] = ch.upper()
+        else:
+            table[c] = '\x00'
+    return table
+
+
+_SCAN_TABLE = _make_scan_table()
+
+
+def _scan(s):
+    """Fusion of invalid_characters and normalization in one pass over s.
+
+    Returns (has_invalid, normalized), where normalized is None whenever
+    an invalid character was found."""
+
+    if not s.isascii():
+        return True, None
+    r = s.translate(_SCAN_TABLE)
+    if '\x00' in r:
+        return True, None
+    return False, ' '.join(r.split())
+
+
+#############################################################################
+# newline translation
+#############################################################################
+
+
+def _to_lf(b):
+    """Same universal-newline translation the old text-mode reads
+    performed, so CRLF output still matches an LF correct file."""
+    if b'\r' in b:
+        return b.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return b
+
+
+#############################################################################
+# correct file cache
+#############################################################################
+
+
+_CORRECT_CACHE_SIZE = 4096
+_correct_cache = {}
 
-    return re.search(r'[^ -~\n\r\t]', s)
-    # ^ means not one of the following:
-    #     ' -~' means one char in [32..126]
-    #     ' -~\n\t\r' means one char in [32..126] or \n or \t or \r
+
+def _correct_entry(path):
+    """Returns (bytes, derived) for the correct file path.
+
+    The correct file is the same for every submission to a problem, so
+    its contents and whatever the checkers derive from them (stored in
+    the derived dict) are kept until the file changes on disk, which is
+    detected through its mtime and size."""
+
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    entry = _correct_cache.get(path)
+    if entry is None or entry[0] != key:
+        if len(_correct_cache) >= _CORRECT_CACHE_SIZE:
+            _correct_cache.clear()
+        entry = (key, _to_lf(util.read_bytes(path)), {})
+        _correct_cache[path] = entry
+    return entry[1], entry[2]
 
 
 #############################################################################
@@ -54,16 +170,22 @@ def standard(file1, file2, pe=True):
         - WA: otherwise.
     """
 
-    t1 = util.read_file(file1)
-    t2 = util.read_file(file2)
-    if t1 == t2:
+    b1 = _to_lf(util.read_bytes(file1))
+    b2, derived = _correct_entry(file2)
+    if b1 == b2:
         return 'AC'
-    elif invalid_characters(t1):
+    # decoding is only needed past the byte-equality fast path; latin-1
+    # never fails and keeps every non-ASCII byte visible to the IC scan
+    invalid, n1 = _scan(b1.decode('latin-1'))
+    if invalid:
         return 'IC'
-    elif pe and normalization(t1) == normalization(t2):
-        return 'PE'
-    else:
-        return 'WA'
+    if pe:
+        n2 = derived.get('norm')
+        if n2 is None:
+            n2 = derived['norm'] = normalization(b2.decode('latin-1'))
+        if n1 == n2:
+            return 'PE'
+    return 'WA'
 
 
 #############################################################################
@@ -106,38 +228,45 @@ def elastic(file1, file2, sep, pe=True):
     """
 
     # Read the files
-    t1 = util.read_file(file1)
-    t2 = util.read_file(file2)
+    b1 = _to_lf(util.read_bytes(file1))
+    b2, derived = _correct_entry(file2)
 
     # Quick check
-    if t1 == t2:
+    if b1 == b2:
         return 'AC'
 
-    # Test for IC
-    if invalid_characters(t1):
+    # Test for IC, on the raw bytes
+    if invalid_characters(b1):
         return 'IC'
+    t1 = b1.decode('latin-1')
 
-    # Split the files in lists
+    # Multiset of correct items, computed once per correct file
+    cnt2 = derived.get(('elastic', sep))
+    if cnt2 is None:
+        cnt2 = derived[('elastic', sep)] = Counter(b2.decode('latin-1').split(sep))
+
+    # Split the file in a list
     list1 = t1.split(sep)
-    list2 = t2.split(sep)
 
     # Test for 'WA' if lists have different sizes
-    if len(list1) != len(list2):
+    if len(list1) != cnt2.total():
         return 'WA'
 
-    # Test for 'AC' if the lists are the same after sorting
-    list1.sort()
-    list2.sort()
-    if list1 == list2:
+    # Test for 'AC' if the two multisets of items are equal; Counter
+    # equality is O(n), cheaper than sorting both lists
+    if Counter(list1) == cnt2:
         return 'AC'
 
     if pe:
-        # Test for 'PE': normalize all the items in the two list
-        list1 = [normalization(x) for x in list1]
-        list2 = [normalization(x) for x in list2]
-        list1.sort()
-        list2.sort()
-        if list1 == list2:
+        # Test for 'PE': normalize all the items in the two lists
+        ncnt2 = derived.get(('elastic-norm', sep))
+        if ncnt2 is None:
+            # normalize each distinct item once and remap its count
+            ncnt2 = Counter()
+            for k, v in zip(_normalize_all(list(cnt2)), cnt2.values()):
+                ncnt2[k] += v
+            derived[('elastic-norm', sep)] = ncnt2
+        if Counter(_normalize_all(list1)) == ncnt2:
             return 'PE'
 
     # Sorry, pal
@@ -161,59 +290,65 @@ def double_elastic(file1, file2, sep1, sep2, ini, fin, pe):
 
 
 def double_elastic2(file1, file2, sep1, sep2, ini, fin):
-    ini = re.escape(ini)
-    fin = re.escape(fin)
+    # ini and fin are literal strings, so framing is a prefix/suffix
+    # check plus a slice, no regex needed
+    li, lf = len(ini), len(fin)
 
     pe = False
 
-    t1 = util.read_file(file1)  # estudiant
-    t2 = util.read_file(file2)  # correcte
+    b1 = _to_lf(util.read_bytes(file1))  # estudiant
+    b2, _ = _correct_entry(file2)  # correcte
 
     # Quick check
-    if t1 == t2:
+    if b1 == b2:
         return 'AC'
 
-    # Test for IC
-    if invalid_characters(t1):
+    # Test for IC, on the raw bytes
+    if invalid_characters(b1):
         return 'IC'
+    t1 = b1.decode('latin-1')
+    t2 = b2.decode('latin-1')
 
-    if re.match(r'^\s*$', t1):
-        if re.match(r'^\s*$', t2):
+    if not t1 or t1.isspace():
+        if not t2 or t2.isspace():
             return 'PE'
         else:
             return 'WA'
-    if re.match(r'^\s*$', t2):
+    if not t2 or t2.isspace():
         return 'WA'
 
-    m1 = re.match(r'^(\s*)(.*\S)(\s*)$', t1, re.DOTALL)
-    m2 = re.match(r'^(\s*)(.*\S)(\s*)$', t2, re.DOTALL)
-
-    if m1.group(1) != m2.group(1) or m1.group(3) != m2.group(3):
+    # compare the leading and trailing whitespace, then strip it
+    if t1[:len(t1) - len(t1.lstrip())] != t2[:len(t2) - len(t2.lstrip())] or \
+       t1[len(t1.rstrip()):] != t2[len(t2.rstrip()):]:
         pe = True
-    t1 = m1.group(2)
-    t2 = m2.group(2)
+    t1 = t1.strip()
+    t2 = t2.strip()
 
     list0 = []
     for x in t1.split('\n'):
         if x == '':
             list0.append('')
         else:
-            m = re.match(r'^(\s*)(.*\S)(\s*)$', x, re.DOTALL)
-            if m:
-                if m.group(1) != '' or m.group(3) != '':
+            s = x.strip()
+            if s:
+                if s != x:
                     pe = True
-                list0.append(m.group(2))
+                list0.append(s)
             else:
+                # whitespace-only line
                 list0.append('')
                 pe = True
     t1 = '\n'.join(list0)
 
-    if sep1 == '\n':
-        t1p = re.sub('\n+', '\n', t1)
-    elif sep1 == '\n\n':
-        t1p = re.sub('\n\n+', '\n\n', t1)
-    elif re.match(r'.*\s', sep1, re.DOTALL):
-        t1p = re.sub('\n\n+', '\n', t1)
+    # t1 is already stripped, so collapsing newline runs to a single
+    # newline is dropping the empty strings of the split and joining
+    # back: one C-level pass, no regex involved
+    if sep1 == '\n\n':
+        t1p = t1
+        while '\n\n\n' in t1p:
+            t1p = t1p.replace('\n\n\n', '\n\n')
+    elif sep1 == '\n' or _ENDS_WS_RE.match(sep1):
+        t1p = '\n'.join(filter(None, t1.split('\n')))
     else:
         return 'IE'
     if t1 != t1p:
@@ -229,30 +364,37 @@ def double_elastic2(file1, file2, sep1, sep2, ini, fin):
     if list1 == list2:
         return 'PE' if pe else 'AC'
 
+    # each frame becomes a tuple of its sorted items, so the outer
+    # comparison is multiset equality with Counter instead of sorting
+    # a list of lists lexicographically
     list1p = []
     for x in list1:
-        m = re.match(r'^%s(.*)%s$' % (ini, fin), x, re.DOTALL)
-        if not m:
+        if len(x) < li + lf or not x.startswith(ini) or not x.endswith(fin):
             return 'WA'
-        list1p.append(sorted(m.group(1).split(sep2)))
+        list1p.append(tuple(sorted(x[li:len(x) - lf].split(sep2))))
 
     list2p = []
     for x in list2:
-        m = re.match(r'^%s(.*)%s$' % (ini, fin), x, re.DOTALL)
-        if not m:
+        if len(x) < li + lf or not x.startswith(ini) or not x.endswith(fin):
             return 'IE'
-        list2p.append(sorted(m.group(1).split(sep2)))
+        list2p.append(tuple(sorted(x[li:len(x) - lf].split(sep2))))
 
-    list1p.sort()
-    list2p.sort()
-    if list1p == list2p:
+    if Counter(list1p) == Counter(list2p):
         return 'PE' if pe else 'AC'
 
-    list1s = [sorted([normalization(y) for y in x]) for x in list1p]
-    list2s = [sorted([normalization(y) for y in x]) for x in list2p]
-    list1s.sort()
-    list2s.sort()
-    if list1s == list2s:
+    # backtracking outputs repeat the same tokens over and over, so
+    # normalize each distinct one only once during this call
+    cache = {}
+
+    def norm(y):
+        v = cache.get(y)
+        if v is None:
+            v = cache[y] = normalization(y)
+        return v
+
+    list1s = [tuple(sorted([norm(y) for y in x])) for x in list1p]
+    list2s = [tuple(sorted([norm(y) for y in x])) for x in list2p]
+    if Counter(list1s) == Counter(list2s):
         return 'PE' if pe else 'AC'
     return 'WA'
 
@@ -263,24 +405,49 @@ def double_elastic2(file1, file2, sep1, sep2, ini, fin):
 
 
 def epsilon(out, cor, eps, relative=False):
-    lines1 = open(cor).readlines()
-    lines2 = open(out).readlines()
-    if len(lines1) != len(lines2):
-        return 'WA'
-    for i in range(len(lines1)):
-        x1 = lines1[i]
-        x2 = lines2[i]
-        f1 = float(x1)
+    tol_factor = 2 * eps / (1.0 - eps)
+
+    if numpy is not None:
+        # Vectorized fast path: converting the line lists with numpy applies
+        # float() per line just as the loop below, so any line that would
+        # make it fail makes the conversion fail and we fall through.
         try:
-            f2 = float(x2)
+            a = numpy.asarray(util.read_file(cor).splitlines(), dtype=numpy.float64)
         except ValueError:
-            return 'WA'
-        if relative:
-            if abs(f1 - f2) > abs(f1) * 2 * eps / (1.0 - eps):
+            a = None
+        if a is not None:
+            # a length mismatch is already WA, so check it on the raw
+            # line list before paying for the float conversion
+            lines = util.read_file(out).splitlines()
+            if len(lines) != a.shape[0]:
                 return 'WA'
-        else:
-            if abs(f1 - f2) > eps:
+            try:
+                b = numpy.asarray(lines, dtype=numpy.float64)
+            except ValueError:
+                return 'WA'
+            tol = numpy.abs(a) * tol_factor if relative else eps
+            return 'AC' if bool(numpy.all(numpy.abs(a - b) <= tol)) else 'WA'
+
+    with open(cor) as file1, open(out) as file2:
+        for x1, x2 in itertools.zip_longest(file1, file2):
+            if x1 is None or x2 is None:
+                # one file has more lines than the other
                 return 'WA'
+            try:
+                f1 = float(x1)
+                f2 = float(x2)
+            except ValueError:
+                # a blank or malformed line on either side is WA, never
+                # an internal error
+                return 'WA'
+            # written as a negated <= so that a NaN anywhere is WA,
+            # exactly as in the vectorized path
+            if relative:
+                if not abs(f1 - f2) <= abs(f1) * tol_factor:
+                    return 'WA'
+            else:
+                if not abs(f1 - f2) <= eps:
+                    return 'WA'
     return 'AC'
 
 
@@ -300,23 +467,9 @@ def external(pgm, inp, out, cor, tim=5):
     if not util.file_exists(pgm):
         return 'IE'
 
-    tmp = util.tmp_file()
-    pid = os.fork()
-    if pid == 0:
-        # Child
-        os.system('./%s %s %s %s > %s' % (pgm, inp, out, cor, tmp))
-        os._exit(0)
-    else:
-        # Parent
-        c = 0
-        while c <= tim:
-            ret = os.waitpid(pid, os.WNOHANG)
-            if ret[0] != 0:
-                # Ok!
-                ver = util.read_file(tmp).strip()
-                util.del_file(tmp)
-                return ver
-            time.sleep(0.1)
-            c += 0.1
-        os.kill(pid, signal.SIGKILL)
+    try:
+        r = subprocess.run(['./' + pgm, inp, out, cor],
+                           stdout=subprocess.PIPE, timeout=tim, check=False)
+    except subprocess.TimeoutExpired:
         return 'IE'
+    return r.stdout.decode('utf-8', 'replace').strip()
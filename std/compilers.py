@@ -1,19 +1,21 @@
 #!/usr/bin/env python3
 
 import sys
-import codecs
+import concurrent.futures
+import functools
+import hashlib
 import glob
 import logging
 import os
+import shlex
 import signal
 import subprocess
-import time
 import shutil
+import tarfile
 import uuid
 
 import monitor
 import util
-import yogi
 
 # Maximum time to compile
 max_compilation_time = 30
@@ -21,6 +23,24 @@ max_compilation_time = 30
 # List of available compilers (will be filled)
 compilers = []
 
+# Registry mapping class-name suffixes to compiler classes (will be filled)
+COMPILERS = {}
+
+
+def register(cls):
+    """Class decorator that registers a compiler class in COMPILERS and
+    its name in the compilers list."""
+    name = cls.__name__.replace('Compiler_', '')
+    COMPILERS[name] = cls
+    compilers.append(name)
+    return cls
+
+# Compilation cache for the C and C++ compilers, when installed
+ccache = shutil.which('ccache')
+
+# Directory for the executable fingerprint cache (disabled when unset)
+compile_cache_dir = os.getenv('JUTGE_COMPILE_CACHE')
+
 
 # Exceptions:
 
@@ -38,6 +58,70 @@ class CompilationError(Exception):
 
 # Helper functions
 
+_version_cache = {}
+
+
+def version_output(cmd):
+    """Returns the output of a version command, running it only once for
+    as long as the underlying binary does not change."""
+    exe = shutil.which(shlex.split(cmd)[0])
+    try:
+        mtime = os.stat(exe).st_mtime_ns if exe else None
+    except OSError:
+        mtime = None
+    key = (cmd, mtime)
+    hit = _version_cache.get(key)
+    if hit is None:
+        hit = _version_cache[key] = subprocess.getoutput(cmd)
+    return hit
+
+
+@functools.lru_cache(maxsize=32)
+def _read_problem_file(path, mtime_ns):
+    return util.read_file(path)
+
+
+def read_problem_file(path):
+    """Returns the contents of a problem or driver file.
+
+    These files (main.*, stubs, templates) are the same for every
+    submission to a problem, so they are cached; the mtime in the cache
+    key invalidates an entry when the file changes on disk."""
+    path = os.path.abspath(path)
+    return _read_problem_file(path, os.stat(path).st_mtime_ns)
+
+
+def python_syntax_ok(path, log):
+    """Checks the syntax of a Python source with the built-in compile,
+    writing any error to the log file. Saves a full interpreter startup
+    compared to shelling out to py_compile."""
+    try:
+        compile(open(path, 'rb').read(), path, 'exec')
+    except Exception as e:
+        util.write_file(log, str(e))
+        return False
+    util.write_file(log, '')
+    return True
+
+
+def ccache_argv(cmd):
+    """Prefixes a compiler command with ccache when it is available, so
+    recompilations of already seen sources come from its cache."""
+    return [ccache, cmd] if ccache else [cmd]
+
+
+def read_optional(path):
+    """Returns the flattened contents of path preceded by a space, or ''
+    if the file does not exist, using a single open instead of an
+    existence check plus a read."""
+    try:
+        with open(path) as f:
+            logging.info("using %s" % path)
+            return ' ' + f.read().replace('\n', ' ')
+    except FileNotFoundError:
+        return ''
+
+
 class Compiler:
     """Compiler base class (abstract)."""
 
@@ -96,27 +180,97 @@ class Compiler:
         """Doc missing."""
         raise Exception('Abstract method')
 
-    def execute_compiler(self, cmd):
+    def compile_cached(self, source, do_compile):
+        """Runs do_compile, memoizing program.exe on disk.
+
+        The cache key fingerprints the source, the flags, the compiler
+        version and the source modifier, so a repeat of an already seen
+        compilation is a copy instead of a compiler run. Only active
+        when $JUTGE_COMPILE_CACHE names a directory."""
+        if not compile_cache_dir:
+            return do_compile()
+        key = hashlib.sha1()
+        key.update(util.read_bytes(source))
+        key.update(('%s %s %s %s' % (self.flags1(), self.flags2(), self.version(),
+                                     self.handler.get('source_modifier'))).encode())
+        cached = os.path.join(compile_cache_dir, key.hexdigest() + '.exe')
+        if util.file_exists(cached):
+            logging.info('compile cache hit: %s' % cached)
+            util.copy_file(cached, 'program.exe')
+            util.write_file('compilation1.txt', '')
+            return True
+        ok = do_compile()
+        if ok and util.file_exists('program.exe'):
+            util.copy_file('program.exe', cached)
+        return ok
+
+    def execute_compiler(self, cmd, cwd=None):
         """Executes the command cmd, but controlling the execution time."""
-        pid = os.fork()
-        if pid == 0:
-            # Child
-            logging.info(cmd)
-            os.system(cmd)
-            if util.file_exists('program.exe'):
-                os.system('strip program.exe')
-            os._exit(0)
+        logging.info(cmd)
+        pro = subprocess.Popen(cmd, shell=True, close_fds=True,
+                               start_new_session=True, cwd=cwd)
+        self.wait_compiler(pro)
+
+    def execute_compiler_argv(self, argv, stdout=None, stderr=None):
+        """As execute_compiler, but runs argv directly, with no shell in
+        between; stdout and stderr optionally name redirection files."""
+        logging.info(' '.join(argv))
+        out = open(stdout, 'w') if stdout else None
+        if stderr == stdout:
+            err = out
         else:
-            # Parent
-            c = 0
-            while c <= max_compilation_time:
-                ret = os.waitpid(pid, os.WNOHANG)
-                if ret[0] != 0:
-                    # Ok!
-                    return
-                time.sleep(0.1)
-                c += 0.1
-            os.kill(pid, signal.SIGKILL)
+            err = open(stderr, 'w') if stderr else None
+        try:
+            pro = subprocess.Popen(argv, stdout=out, stderr=err,
+                                   close_fds=True, start_new_session=True)
+            self.wait_compiler(pro)
+        finally:
+            if out:
+                out.close()
+            if err and err is not out:
+                err.close()
+
+    def execute_compiler_stdin(self, argv, data, stderr=None):
+        """As execute_compiler_argv, but feeds data to the compiler on
+        its standard input, so generated sources never touch the disk."""
+        logging.info(' '.join(argv))
+        err = open(stderr, 'w') if stderr else None
+        try:
+            pro = subprocess.Popen(argv, stdin=subprocess.PIPE, stderr=err,
+                                   close_fds=True, start_new_session=True)
+            try:
+                pro.communicate(data.encode('utf-8', 'replace'),
+                                timeout=max_compilation_time)
+            except subprocess.TimeoutExpired:
+                os.killpg(pro.pid, signal.SIGKILL)
+                pro.wait()
+                raise CompilationTooLong
+        finally:
+            if err:
+                err.close()
+
+    def execute_compiler_capture(self, argv):
+        """As execute_compiler_argv, but captures the command's stdout and
+        stderr in memory and returns them as a pair of strings."""
+        logging.info(' '.join(argv))
+        pro = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               close_fds=True, start_new_session=True)
+        try:
+            out, err = pro.communicate(timeout=max_compilation_time)
+        except subprocess.TimeoutExpired:
+            os.killpg(pro.pid, signal.SIGKILL)
+            pro.wait()
+            raise CompilationTooLong
+        return out.decode('utf-8', 'replace'), err.decode('utf-8', 'replace')
+
+    def wait_compiler(self, pro):
+        """Waits for a started compilation, enforcing max_compilation_time."""
+        try:
+            pro.wait(timeout=max_compilation_time)
+        except subprocess.TimeoutExpired:
+            # kill the whole session, so the compiler goes down with the shell
+            os.killpg(pro.pid, signal.SIGKILL)
+            pro.wait()
             raise CompilationTooLong
 
     def execute_monitor(self, tst, pgm):
@@ -124,13 +278,7 @@ class Compiler:
 
         # Get options for the monitor
         cpl = self.id()
-        ops = ''
-        if util.file_exists(tst + '.ops'):
-            logging.info("using %s" % (tst + '.ops'))
-            ops += ' ' + util.read_file(tst + '.ops').replace('\n', ' ')
-        if util.file_exists(tst + '.' + cpl + '.ops'):
-            logging.info("using %s" % (tst + '.' + cpl + '.ops'))
-            ops += ' ' + util.read_file(tst + '.' + cpl + '.ops').replace('\n', ' ')
+        ops = read_optional(tst + '.ops') + read_optional(tst + '.' + cpl + '.ops')
 
         if cpl in ["Python", "Python3", "MyPy"]:
             maxtime = 30
@@ -139,18 +287,16 @@ class Compiler:
         else:
             maxtime = 6
 
-        # Prepare the command
-        cmd = '%s --basename=%s --maxtime=%i %s %s' \
-              % (monitor.path, tst, maxtime, ops, pgm)
+        # Prepare the command as an argument list; with a direct argv and
+        # close_fds disabled, the child is started with posix_spawn
+        # instead of fork plus a shell and an fd-table scan
+        argv = [monitor.path, '--basename=%s' % tst, '--maxtime=%i' % maxtime] \
+            + shlex.split(ops) + shlex.split(pgm)
 
         # Execute the command and get its result code
-        logging.info(cmd)
-        pro = subprocess.Popen(cmd, shell=True, close_fds=True)
-        r = pro.wait()
-        if r > 256:
-            r /= 256
-
-        if r != 0:
+        logging.info(' '.join(argv))
+        pro = subprocess.Popen(argv, close_fds=False)
+        if pro.wait() != 0:
             raise ExecutionError
 
     def execute_monitor_in_tmp(self, tst, pgm):
@@ -160,18 +306,32 @@ class Compiler:
         wrk = '/tmp/monitor.' + tst + '.' + str(uuid.uuid4())[:8]
         util.del_dir(wrk)
         os.mkdir(wrk)
-        os.system('cp -r * ' + wrk)
+        self.copy_entries(ori, wrk)
         os.chdir(wrk)
         try:
             self.execute_monitor(tst, pgm)
         finally:
-            os.system('cp -r * ' + ori)
+            self.copy_entries(wrk, ori)
             os.chdir(ori)
 
+    def move_entries(self, src, dst):
+        """Moves every entry of directory src into directory dst."""
+        for entry in os.scandir(src):
+            util.move_file(entry.path, os.path.join(dst, entry.name))
+
+    def copy_entries(self, src, dst):
+        """Copies every entry of directory src into directory dst."""
+        for entry in os.scandir(src):
+            if entry.is_dir(follow_symlinks=False):
+                shutil.copytree(entry.path, os.path.join(dst, entry.name),
+                                dirs_exist_ok=True)
+            else:
+                shutil.copy(entry.path, os.path.join(dst, entry.name))
+
     def get_version(self, cmd, lin):
         """Private method to get a particular line from a command output."""
         try:
-            return subprocess.getoutput(cmd).split('\n')[lin].strip()
+            return version_output(cmd).split('\n')[lin].strip()
         except:
             return None
 
@@ -225,15 +385,16 @@ class Compiler_GenericC(Compiler):
         if 'source_modifier' in self.handler and (
                 self.handler['source_modifier'] == 'no_main' or
                 self.handler['source_modifier'] == 'structs'):
-            return self.compile_no_main()
+            return self.compile_cached('program.c', self.compile_no_main)
         else:
-            return self.compile_normal()
+            return self.compile_cached('program.c', self.compile_normal)
 
     def compile_normal(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler(
-                f'{self.cmd()} {self.flags1()} program.c -o program.exe -lm 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ccache_argv(self.cmd()) + self.flags1().split() + ['program.c', '-o', 'program.exe', '-lm', '-s'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -246,8 +407,9 @@ class Compiler_GenericC(Compiler):
         util.del_file('program.exe')
         util.del_file('program.o')
         try:
-            self.execute_compiler(
-                f'{self.cmd()} -c {self.flags1()} program.c 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ccache_argv(self.cmd()) + ['-c'] + self.flags1().split() + ['program.c'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.o')
@@ -256,24 +418,20 @@ class Compiler_GenericC(Compiler):
             return False
 
         # Modify the program
-        util.copy_file('program.c', 'original.c')
-        original = util.read_file('original.c')
-        main = util.read_file('../problem/main.c')
-
-        util.copy_file("../driver/etc/c/program.c", ".")
-        with open("program.c", "r+") as f:
-            program = f.read()
-            f.seek(0)
-            program = program.replace('{original}', original)
-            program = program.replace('{main}', main)
-            f.write(program)
-            f.truncate()
+        original = util.read_file('program.c')
+        util.copy_source('program.c', 'original.c')
+        main = read_problem_file('../problem/main.c')
 
-        # Compile modified program
+        program = read_problem_file('../driver/etc/c/program.c')
+        program = program.replace('{original}', original)
+        program = program.replace('{main}', main)
+
+        # Compile modified program, fed on standard input
         util.del_file('program.exe')
         try:
-            self.execute_compiler(
-                f'{self.cmd()} {self.flags2()} program.c -o program.exe -lm 2> compilation2.txt')
+            self.execute_compiler_stdin(
+                ccache_argv(self.cmd()) + self.flags2().split() + ['-x', 'c', '-', '-o', 'program.exe', '-lm', '-s'],
+                program, stderr='compilation2.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -288,9 +446,8 @@ class Compiler_GenericC(Compiler):
             return False
 
 
+@register
 class Compiler_GCC(Compiler_GenericC):
-    compilers.append('GCC')
-
     def cmd(self):
         return 'gcc'
 
@@ -298,9 +455,8 @@ class Compiler_GCC(Compiler_GenericC):
         return 'GNU C Compiler'
 
 
+@register
 class Compiler_Clang(Compiler_GenericC):
-    compilers.append('Clang')
-
     def cmd(self):
         return 'clang'
 
@@ -338,52 +494,30 @@ class Compiler_GenericCXX(Compiler):
         if 'source_modifier' in self.handler and (
                 self.handler['source_modifier'] == 'no_main' or
                 self.handler['source_modifier'] == 'structs'):
-            return self.compile_no_main()
+            return self.compile_cached('program.cc', self.compile_no_main)
         else:
-            return self.compile_normal()
+            return self.compile_cached('program.cc', self.compile_normal)
 
     def compile_normal(self):
 
-        # Compile original program
-        util.del_file('program.exe')
-        try:
-            self.execute_compiler(
-                f'{self.cmd()} {self.flags1()} program.cc -o program.exe 2> compilation1.txt')
-        except CompilationTooLong:
-            util.write_file('compilation1.txt', 'Compilation time exceeded')
-            util.del_file('program.exe')
-            return False
-        if not util.file_exists('program.exe'):
-            return False
-
-        # Modify the program
-        util.copy_file('program.cc', 'original.cc')
-        original = util.read_file('original.cc')
-        stub = util.read_file('../driver/etc/cc/stub.cc')
-        util.copy_file("../driver/etc/cc/normal.cc", "./program.cc")
-        with open("program.cc", "r+") as f:
-            program = f.read()
-            f.seek(0)
-            program = program.replace('{original}', original)
-            program = program.replace('{stub}', stub)
-            f.write(program)
-            f.truncate()
-
-        # Compile modified program
+        # Compile the original program with the stub injected through
+        # -include, so a single compiler run yields the instrumented
+        # executable and the diagnostics still point at program.cc.
+        # flags1 is the set that gates the verdict (P1XX adds -Werror
+        # and friends there).
         util.del_file('program.exe')
         try:
-            self.execute_compiler(
-                f'{self.cmd()} {self.flags2()} program.cc -o program.exe 2> compilation2.txt')
+            self.execute_compiler_argv(
+                ccache_argv(self.cmd()) + self.flags1().split()
+                + ['-include', '../driver/etc/cc/stub.cc', 'program.cc', '-o', 'program.exe', '-s'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
             return False
-
-        # We are almost there
         if util.file_exists('program.exe'):
             return True
         else:
-            util.write_file('compilation1.txt', 'Unreported error. ')
             util.del_file('program.exe')
             return False
 
@@ -393,8 +527,9 @@ class Compiler_GenericCXX(Compiler):
         util.del_file('program.exe')
         util.del_file('program.o')
         try:
-            self.execute_compiler(
-                f'{self.cmd()} -c {self.flags1()} program.cc 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ccache_argv(self.cmd()) + ['-c'] + self.flags1().split() + ['program.cc'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.o')
@@ -403,25 +538,21 @@ class Compiler_GenericCXX(Compiler):
             return False
 
         # Modify the program
-        util.copy_file('program.cc', 'original.cc')
-        original = util.read_file('original.cc')
-        main = util.read_file('../problem/main.cc')
-        stub = util.read_file('../driver/etc/cc/stub.cc')
-        util.copy_file("../driver/etc/cc/nomain.cc", "./program.cc")
-        with open("program.cc", "r+") as f:
-            program = f.read()
-            f.seek(0)
-            program = program.replace('{original}', original)
-            program = program.replace('{main}', main)
-            program = program.replace('{stub}', stub)
-            f.write(program)
-            f.truncate()
-
-        # Compile modified program
+        original = util.read_file('program.cc')
+        util.copy_source('program.cc', 'original.cc')
+        main = read_problem_file('../problem/main.cc')
+        stub = read_problem_file('../driver/etc/cc/stub.cc')
+        program = read_problem_file('../driver/etc/cc/nomain.cc')
+        program = program.replace('{original}', original)
+        program = program.replace('{main}', main)
+        program = program.replace('{stub}', stub)
+
+        # Compile modified program, fed on standard input
         util.del_file('program.exe')
         try:
-            self.execute_compiler(
-                f'{self.cmd()} {self.flags2()} program.cc -o program.exe 2> compilation2.txt')
+            self.execute_compiler_stdin(
+                ccache_argv(self.cmd()) + self.flags2().split() + ['-x', 'c++', '-', '-o', 'program.exe', '-s'],
+                program, stderr='compilation2.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -436,9 +567,8 @@ class Compiler_GenericCXX(Compiler):
             return False
 
 
+@register
 class Compiler_GXX(Compiler_GenericCXX):
-    compilers.append('GXX')
-
     def cmd(self):
         return 'g++'
 
@@ -452,9 +582,8 @@ class Compiler_GXX(Compiler_GenericCXX):
         return '-D_JUDGE_ -DNDEBUG -O2'
 
 
+@register
 class Compiler_P1XX(Compiler_GXX):
-    compilers.append('P1XX')
-
     def flags1(self):
         return '-D_JUDGE_ -DNDEBUG -O2 -Wall -Wextra -Werror -Wno-sign-compare -Wshadow'
 
@@ -462,9 +591,8 @@ class Compiler_P1XX(Compiler_GXX):
         return 'GNU C++ Compiler with extra flags for beginners'
 
 
+@register
 class Compiler_GXX11(Compiler_GXX):
-    compilers.append('GXX11')
-
     def name(self):
         return 'GNU C++11 Compiler'
 
@@ -475,9 +603,8 @@ class Compiler_GXX11(Compiler_GXX):
         return '-D_JUDGE_ -DNDEBUG -O2 -std=c++11'
 
 
+@register
 class Compiler_GXX17(Compiler_GXX):
-    compilers.append('GXX17')
-
     def name(self):
         return 'GNU C++17 Compiler'
 
@@ -488,9 +615,8 @@ class Compiler_GXX17(Compiler_GXX):
         return '-D_JUDGE_ -DNDEBUG -O2 -std=c++17'
 
 
+@register
 class Compiler_ClangXX17(Compiler_GenericCXX):
-    compilers.append('ClangXX17')
-
     def cmd(self):
         return 'clang++'
 
@@ -504,9 +630,8 @@ class Compiler_ClangXX17(Compiler_GenericCXX):
         return '-D_JUDGE_ -DNDEBUG -O2 -std=c++17'
 
 
+@register
 class Compiler_GPC(Compiler):
-    compilers.append('GPC')
-
     def name(self):
         return 'GNU Pascal Compiler'
 
@@ -537,11 +662,12 @@ class Compiler_GPC(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('gpc -c ' + self.flags1() + ' program.pas 2> compilation1.txt')
+            # One shell run: the link stage only starts if gpc succeeds
+            self.execute_compiler(
+                'gpc -c ' + self.flags1() + ' program.pas 2> compilation1.txt && '
+                'g++ -s program.o -L/usr/lib/gcc/i486-linux-gnu/4.1 -lgpc -o program.exe > linkage.txt 2>&1')
             if not util.file_exists('program.o'):
                 return False
-            self.execute_compiler(
-                'g++ program.o -L/usr/lib/gcc/i486-linux-gnu/4.1 -lgpc -o program.exe > linkage.txt 2>&1')
             if not util.file_exists('program.exe'):
                 util.write_file('compilation1.txt', 'Linkage error')
         except CompilationTooLong:
@@ -554,9 +680,8 @@ class Compiler_GPC(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_GFortran(Compiler):
-    compilers.append('GFortran')
-
     def name(self):
         return 'GNU Fortran Compiler'
 
@@ -587,8 +712,9 @@ class Compiler_GFortran(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('gfortran ' + self.flags1() +
-                                  ' program.f -o program.exe 1> /dev/null 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['gfortran', '-s'] + self.flags1().split() + ['program.f', '-o', 'program.exe'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -599,9 +725,8 @@ class Compiler_GFortran(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_GObjC(Compiler):
-    compilers.append('GObjC')
-
     def name(self):
         return 'GNU Objective-C Compiler'
 
@@ -632,8 +757,9 @@ class Compiler_GObjC(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('gcc ' + self.flags1() +
-                                  ' program.m -o program.exe 1> /dev/null 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['gcc', '-s'] + self.flags1().split() + ['program.m', '-o', 'program.exe'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -644,9 +770,8 @@ class Compiler_GObjC(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_GHC(Compiler):
-    compilers.append('GHC')
-
     def name(self):
         return 'Glasgow Haskell Compiler'
 
@@ -683,8 +808,9 @@ class Compiler_GHC(Compiler):
     def compile_normal(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('ghc ' + self.flags1() +
-                                  ' program.hs -o program.exe 1> /dev/null 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['ghc', '-optl-s'] + self.flags1().split() + ['program.hs', '-o', 'program.exe'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -697,13 +823,14 @@ class Compiler_GHC(Compiler):
 
         util.copy_file('program.hs', 'original.hs')
         ori = util.read_file('program.hs')
-        main = util.read_file('../problem/main.hs')
+        main = read_problem_file('../problem/main.hs')
         util.write_file('program.hs', '%s\n\n\n%s\n' % (ori, main))
 
         util.del_file('program.exe')
         try:
-            self.execute_compiler('ghc ' + self.flags1() +
-                                  ' program.hs -o program.exe 1> /dev/null 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['ghc', '-optl-s'] + self.flags1().split() + ['program.hs', '-o', 'program.exe'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -714,9 +841,8 @@ class Compiler_GHC(Compiler):
         self.execute_monitor(tst, '--maxmem=1400:128 ./program.exe')
 
 
+@register
 class Compiler_RunHaskell(Compiler):
-    compilers.append('RunHaskell')
-
     def name(self):
         return 'Glasgow Haskell Compiler (with tweaks for testing in the judge)'
 
@@ -754,25 +880,20 @@ class Compiler_RunHaskell(Compiler):
 
     def compile_with(self, extra):
         try:
-            util.copy_file("program.hs", "work.hs")
+            data = util.read_file("program.hs")
             if util.file_exists("judge.hs"):
-                os.system("cat judge.hs >> work.hs")
-            data = open("work.hs", "r").read()
-            f = open("work.hs", "w")
-            print("module Main (mainjutgeorg) where", file=f)
-            print("", file=f)
-            print(data, file=f)
-            print("", file=f)
-            print("mainjutgeorg = do", file=f)
-            for line in open(extra).readlines():
+                data += util.read_file("judge.hs")
+            lines = ["module Main (mainjutgeorg) where", "", data, "", "mainjutgeorg = do"]
+            for line in util.read_file(extra).splitlines():
                 line = line.rstrip()
                 if line.startswith("let "):
-                    print("    %s" % line, file=f)
+                    lines.append("    %s" % line)
                 else:
-                    print("    print (%s)" % line, file=f)
-            f.close()
-            self.execute_compiler('ghc  -main-is mainjutgeorg ' + self.flags1() +
-                                  ' work.hs -o work.exe 1> /dev/null 2> compilation1.txt')
+                    lines.append("    print (%s)" % line)
+            util.write_file("work.hs", '\n'.join(lines) + '\n')
+            self.execute_compiler_argv(
+                ['ghc', '-main-is', 'mainjutgeorg'] + self.flags1().split() + ['work.hs', '-o', 'work.exe'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             return False
@@ -791,9 +912,8 @@ class Compiler_RunHaskell(Compiler):
             f.close()
 
 
+@register
 class Compiler_RunPython(Compiler):
-    compilers.append('RunPython')
-
     def name(self):
         return 'Python3 Interpreter (with tweaks for testing in the judge)'
 
@@ -824,28 +944,16 @@ class Compiler_RunPython(Compiler):
         return 'py'
 
     def compile(self):
-        util.del_file('compilation1.txt')
-        try:
-            self.execute_compiler(
-                'python3 -m py_compile program.py 1> /dev/null 2> compilation1.txt')
-        except CompilationTooLong:
-            util.write_file('compilation1.txt', 'Compilation time exceeded')
-            return False
-        return util.file_size('compilation1.txt') == 0
+        return python_syntax_ok('program.py', 'compilation1.txt')
 
     def compile_with(self, extra):
-        try:
-            util.copy_file("program.py", "work.py")
-            os.system("echo '' >> work.py")
-            os.system("echo '' >> work.py")
-            if util.file_exists("judge.py"):
-                os.system("cat judge.py >> work.py")
-            os.system("cat %s >> work.py" % extra)
-            self.execute_compiler('python3 -m py_compile work.py 1> /dev/null 2> compilation2.txt')
-            return True
-        except CompilationTooLong:
-            util.write_file('compilation1.txt', 'Compilation time exceeded')
-        return False
+        parts = [util.read_file("program.py"), '\n\n']
+        if util.file_exists("judge.py"):
+            parts.append(util.read_file("judge.py"))
+        parts.append(util.read_file(extra))
+        util.write_file("work.py", ''.join(parts))
+        python_syntax_ok('work.py', 'compilation2.txt')
+        return True
 
     def execute(self, tst):
         if self.compile_with(tst + ".inp"):
@@ -865,9 +973,8 @@ class Compiler_RunPython(Compiler):
             print("execution_error: Cannot test", file=f)
             f.close()
 
+@register
 class Compiler_Clojure(Compiler):
-    compilers.append('Clojure')
-
     def name(self):
         return 'Clojure'
 
@@ -914,9 +1021,8 @@ class Compiler_Clojure(Compiler):
             util.del_file('deps.edn')
 
 
+@register
 class Compiler_RunClojure(Compiler):
-    compilers.append('RunClojure')
-
     def name(self):
         return 'Clojure (with tweaks for testing in the judge)'
 
@@ -952,13 +1058,12 @@ class Compiler_RunClojure(Compiler):
     def compile_with(self, extra):
         util.copy_file("program.clj", "work.clj")
         if util.file_exists("judge.clj"):
-            os.system("cat judge.clj >> work.clj")
-        f = open("work.clj", "a")
+            with open('work.clj', 'a') as f:
+                f.write(util.read_file('judge.clj'))
         print("\n")
-        for line in open(extra).readlines():
-            line = line.rstrip()
-            print("(println %s)" % line, file=f)
-        f.close()
+        with open("work.clj", "a") as f, open(extra) as inp:
+            for line in inp:
+                print("(println %s)" % line.rstrip(), file=f)
         return util.file_exists('work.clj')
 
     def execute(self, tst):
@@ -970,9 +1075,8 @@ class Compiler_RunClojure(Compiler):
             else:
                 util.del_file('deps.edn')
 
+@register
 class Compiler_GDC(Compiler):
-    compilers.append('GDC')
-
     def name(self):
         return 'GNU D Compiler'
 
@@ -1003,8 +1107,9 @@ class Compiler_GDC(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('gdc ' + self.flags1() +
-                                  ' program.d -o program.exe 1> /dev/null 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['gdc', '-s'] + self.flags1().split() + ['program.d', '-o', 'program.exe'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -1015,9 +1120,8 @@ class Compiler_GDC(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_F2C(Compiler):
-    compilers.append('F2C')
-
     def name(self):
         return 'Fortran 77 Compiler'
 
@@ -1048,10 +1152,12 @@ class Compiler_F2C(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('f2c program.f 1> /dev/null 2> compilation1.txt')
+            # One shell run: the C stage only starts if f2c succeeds
+            self.execute_compiler(
+                'f2c program.f 1> /dev/null 2> compilation1.txt && '
+                'cc -O2 -s program.c -lf2c -lm -o program.exe 1> linkage.txt 2>&1')
             if not util.file_exists('program.c'):
                 return False
-            self.execute_compiler('cc -O2 program.c -lf2c -lm -o program.exe 1> linkage.txt 2>&1')
             if not util.file_exists('program.exe'):
                 util.write_file('compilation1.txt', 'C compilation failed')
             util.del_file('program.c')
@@ -1065,9 +1171,8 @@ class Compiler_F2C(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_P2C(Compiler):
-    compilers.append('P2C')
-
     def name(self):
         return 'Pascal to C translator'
 
@@ -1098,10 +1203,12 @@ class Compiler_P2C(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('p2c -a program.pas  1> compilation1.txt 2> /dev/null')
+            # One shell run: the C stage only starts if p2c succeeds
+            self.execute_compiler(
+                'p2c -a program.pas 1> compilation1.txt 2> /dev/null && '
+                'cc -O2 -s program.c -lp2c -lm -o program.exe 1> linkage.txt 2>&1')
             if not util.file_exists('program.c'):
                 return False
-            self.execute_compiler('cc -O2 program.c -lp2c -lm -o program.exe 1> linkage.txt 2>&1')
             if not util.file_exists('program.exe'):
                 util.write_file('compilation1.txt', 'C compilation failed')
             util.del_file('program.c')
@@ -1115,9 +1222,8 @@ class Compiler_P2C(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_Stalin(Compiler):
-    compilers.append('Stalin')
-
     def name(self):
         return 'Stalin'
 
@@ -1148,10 +1254,12 @@ class Compiler_Stalin(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('stalin -c -On program.scm 2> /dev/null 1> compilation1.txt')
+            # One shell run: the C stage only starts if stalin succeeds
+            self.execute_compiler(
+                'stalin -c -On program.scm 2> /dev/null 1> compilation1.txt && '
+                'gcc -O2 -s program.c -lm -o program.exe 1> linkage.txt 2>&1')
             if not util.file_exists('program.c'):
                 return False
-            self.execute_compiler('gcc -O2 program.c -lm -o program.exe 1> linkage.txt 2>&1')
             if not util.file_exists('program.exe'):
                 util.write_file('compilation1.txt', 'C compilation failed')
             util.del_file('program.c')
@@ -1165,9 +1273,8 @@ class Compiler_Stalin(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_Chicken(Compiler):
-    compilers.append('Chicken')
-
     def name(self):
         return 'Chicken'
 
@@ -1198,7 +1305,10 @@ class Compiler_Chicken(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('csc program.scm -o program.exe 1> /dev/null 2> compilation1.txt')
+            _, err = self.execute_compiler_capture(
+                ['csc', 'program.scm', '-o', 'program.exe'])
+            if err:
+                util.write_file('compilation1.txt', err)
             if not util.file_exists('program.exe'):
                 return False
         except CompilationTooLong:
@@ -1211,9 +1321,8 @@ class Compiler_Chicken(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_GCJ(Compiler):
-    compilers.append('GCJ')
-
     def name(self):
         return 'GNU Java Compiler'
 
@@ -1244,8 +1353,9 @@ class Compiler_GCJ(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('gcj ' + self.flags1() +
-                                  ' program.java -o program.exe 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['gcj', '-s'] + self.flags1().split() + ['program.java', '-o', 'program.exe'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -1256,9 +1366,8 @@ class Compiler_GCJ(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_GNAT(Compiler):
-    compilers.append('GNAT')
-
     def name(self):
         return 'GNU Ada Compiler'
 
@@ -1289,8 +1398,9 @@ class Compiler_GNAT(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('gnat make ' + self.flags1() +
-                                  ' program.ada -o program.exe 1> /dev/null 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['gnat', 'make'] + self.flags1().split() + ['program.ada', '-o', 'program.exe'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -1301,9 +1411,8 @@ class Compiler_GNAT(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_FPC(Compiler):
-    compilers.append('FPC')
-
     def name(self):
         return 'Free Pascal Compiler'
 
@@ -1334,8 +1443,9 @@ class Compiler_FPC(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('fpc ' + self.flags1() +
-                                  ' program.pas -oprogram.exe > compilation1.txt')
+            self.execute_compiler_argv(
+                ['fpc'] + self.flags1().split() + ['program.pas', '-oprogram.exe'],
+                stdout='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -1346,9 +1456,8 @@ class Compiler_FPC(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_FBC(Compiler):
-    compilers.append('FBC')
-
     def name(self):
         return 'FreeBASIC Compiler'
 
@@ -1381,8 +1490,10 @@ class Compiler_FBC(Compiler):
         util.del_file('program.exe')
         util.del_file('program')
         try:
-            self.execute_compiler('fbc ' + self.flags1() +
-                                  ' program.bas 1> compilation1.txt 2> /dev/null')
+            out, _ = self.execute_compiler_capture(
+                ['fbc'] + self.flags1().split() + ['program.bas'])
+            if out:
+                util.write_file('compilation1.txt', out)
             if not util.file_exists('program'):
                 return False
             else:
@@ -1398,9 +1509,8 @@ class Compiler_FBC(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_JDK(Compiler):
-    compilers.append('JDK')
-
     def name(self):
         return 'OpenJDK Runtime Environment'
 
@@ -1408,7 +1518,7 @@ class Compiler_JDK(Compiler):
         return 'compiler (vm)'
 
     def executable(self):
-        return 'Main.class'
+        return 'classes/Main.class'
 
     def language(self):
         return 'Java'
@@ -1417,7 +1527,9 @@ class Compiler_JDK(Compiler):
         return self.get_version('java -version', 0).replace('"', "'")
 
     def flags1(self):
-        return ''
+        # Trim the warmup of the JVM that runs javac: stick to the first
+        # JIT tier and map the shared class-data archive when available
+        return '-J-XX:TieredStopAtLevel=1 -J-Xshare:auto'
 
     def flags2(self):
         return ''
@@ -1432,46 +1544,48 @@ class Compiler_JDK(Compiler):
             return self.compile_normal()
 
     def compile_normal(self):
-        for f in glob.glob('*.class'):
-            util.del_file(f)
+        shutil.rmtree('classes', ignore_errors=True)
+        os.makedirs('classes')
         try:
             util.copy_file('../driver/etc/jdk/JudgeMain.java', '.')
-            util.copy_file('program.java', 'Main.java')
-            self.execute_compiler('javac ' + self.flags1() + ' JudgeMain.java 2> compilation1.txt')
+            util.copy_source('program.java', 'Main.java')
+            self.execute_compiler_argv(
+                ['javac'] + self.flags1().split() + ['-d', 'classes', 'JudgeMain.java'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             return False
-        return util.file_exists('Main.class')
+        return util.file_exists('classes/Main.class')
 
     def compile_no_main(self):
         # esta fet a sac!!! cal fer-ho be
 
-        for f in glob.glob('*.class'):
-            util.del_file(f)
+        shutil.rmtree('classes', ignore_errors=True)
+        os.makedirs('classes')
         try:
-            # create Solution.class
-            self.execute_compiler('javac ' + self.flags1() + ' program.java 2> compilation1.txt')
-            # create Main.class
+            # create Solution.class, Main.class and JudgeMain.class with a
+            # single javac run, so the JVM starts up once instead of thrice
             util.copy_file('../problem/main.java', '.')
-            self.execute_compiler('javac ' + self.flags1() + ' main.java 2> compilation2.txt')
-            # create JudgeMain.class
             util.copy_file('../driver/etc/jdk/JudgeMain.java', 'JudgeMain.java')
-            self.execute_compiler('javac ' + self.flags1() + ' JudgeMain.java 2> compilation2.txt')
+            self.execute_compiler_argv(
+                ['javac'] + self.flags1().split() + ['-d', 'classes', 'program.java', 'main.java', 'JudgeMain.java'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             return False
-        return util.file_exists('Main.class')
+        return util.file_exists('classes/Main.class')
 
     def prepare_execution(self, ori):
-        os.system('cp ' + ori + '/*.class .')
+        util.mkdir('classes')
+        for p in glob.glob(ori + '/classes/*.class'):
+            try:
+                os.link(p, 'classes/' + os.path.basename(p))
+            except OSError:
+                util.copy_file(p, 'classes')
 
     def execute(self, tst):
 
-        ops = ''
-        if util.file_exists(tst + '.ops'):
-            ops += ' ' + util.read_file(tst + '.ops').replace('\n', ' ')
-        if util.file_exists(tst + '.JDK.ops'):
-            ops += ' ' + util.read_file(tst + '.JDK.ops').replace('\n', ' ')
+        ops = read_optional(tst + '.ops') + read_optional(tst + '.JDK.ops')
 
         # Extra options to run the JVM under the monitor
         opsX = '--maxfiles=4096 --maxprocs=100 --maxmem=2048:2048 '
@@ -1479,10 +1593,11 @@ class Compiler_JDK(Compiler):
         # Options for the JVM to set its maximal heap size and stack size
         opsJ = '-Xmx1024M -Xss1024M'
 
-        # Prepare the command
+        # Prepare the command as an argument list, so no shell is forked
         cls = "JudgeMain"
-        cmd = '%s --basename=%s --maxtime=10 %s %s -- /usr/bin/java %s %s' \
-              % (monitor.path, tst, ops, opsX, opsJ, cls)
+        argv = [monitor.path, '--basename=%s' % tst, '--maxtime=10'] \
+            + shlex.split(ops) + shlex.split(opsX) \
+            + ['--', '/usr/bin/java'] + opsJ.split() + ['-cp', 'classes', cls]
 
         # Execute the command and get its result code
         # Because JDK does not like to have its path blocked, the directory cannot be in
@@ -1491,18 +1606,16 @@ class Compiler_JDK(Compiler):
         # move to tmp
         old = os.getcwd()
         tmp = util.tmp_dir()
-        os.system("mv * " + tmp)
+        self.move_entries(old, tmp)
         os.chdir(tmp)
 
         # do work
-        logging.info(cmd)
-        pro = subprocess.Popen(cmd, shell=True, close_fds=True)
+        logging.info(' '.join(argv))
+        pro = subprocess.Popen(argv, close_fds=False)
         r = pro.wait()
-        if r > 256:
-            r = r / 256
 
         # move back from /tmp
-        os.system("mv * " + old)
+        self.move_entries(tmp, old)
         os.chdir(old)
 
         # exit
@@ -1510,9 +1623,8 @@ class Compiler_JDK(Compiler):
             raise ExecutionError
 
 
+@register
 class Compiler_MonoCS(Compiler):
-    compilers.append('MonoCS')
-
     def name(self):
         return 'Mono C# Compiler'
 
@@ -1543,8 +1655,10 @@ class Compiler_MonoCS(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('mcs ' + self.flags1() +
-                                  ' program.cs 1> /dev/null 2> compilation1.txt')
+            _, err = self.execute_compiler_capture(
+                ['mcs'] + self.flags1().split() + ['program.cs'])
+            if err:
+                util.write_file('compilation1.txt', err)
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -1555,11 +1669,9 @@ class Compiler_MonoCS(Compiler):
         self.execute_monitor(tst, 'mono ./program.exe')
 
 
+@register
 class Compiler_Python(Compiler):
     """Obslote. It is here because of old submissions."""
-
-    compilers.append('Python')
-
     def name(self):
         return 'Python'
 
@@ -1585,9 +1697,8 @@ class Compiler_Python(Compiler):
         return 'py'
 
 
+@register
 class Compiler_Python3(Compiler):
-    compilers.append('Python3')
-
     def name(self):
         return 'Python3'
 
@@ -1599,6 +1710,8 @@ class Compiler_Python3(Compiler):
 
     def prepare_execution(self, ori):
         util.copy_file(ori + '/' + self.executable(), '.')
+        if util.file_exists(ori + '/program.pyc'):
+            util.copy_file(ori + '/program.pyc', '.')
 
     def language(self):
         return 'Python'
@@ -1622,43 +1735,42 @@ class Compiler_Python3(Compiler):
         else:
             return self.compile_normal()
 
-    def compile_normal(self):
-        util.del_file('compilation1.txt')
+    def write_bytecode(self):
+        """Precompiles program.py with the execution interpreter, so each
+        test run skips the parse step. Execution falls back to the plain
+        source when no bytecode could be produced."""
+        util.del_file('program.pyc')
         try:
-            self.execute_compiler(
-                'python3 -m py_compile program.py 1> /dev/null 2> compilation1.txt')
-        except CompilationTooLong:
-            util.write_file('compilation1.txt', 'Compilation time exceeded')
+            subprocess.run(
+                ['/usr/bin/python3', '-c',
+                 "import py_compile; py_compile.compile('program.py', cfile='program.pyc', doraise=True)"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                timeout=max_compilation_time)
+        except subprocess.TimeoutExpired:
+            util.del_file('program.pyc')
+
+    def compile_normal(self):
+        if not python_syntax_ok('program.py', 'compilation1.txt'):
             return False
-        return util.file_size('compilation1.txt') == 0
+        self.write_bytecode()
+        return True
 
     def compile_no_main(self):
-        util.del_file('compilation1.txt')
-        try:
-            self.execute_compiler(
-                'python3 -m py_compile program.py 1> /dev/null 2> compilation1.txt')
-        except CompilationTooLong:
-            util.write_file('compilation1.txt', 'Compilation time exceeded')
-            return False
-        if util.file_size('compilation1.txt') != 0:
+        if not python_syntax_ok('program.py', 'compilation1.txt'):
             return False
 
         # Modify the program
-        util.copy_file('program.py', 'original.py')
+        util.copy_source('program.py', 'original.py')
         ori = util.read_file('program.py')
-        main = util.read_file('../problem/main.py')
+        main = read_problem_file('../problem/main.py')
         name = '__name__ = "__jutge__"'
         util.write_file('program.py', '%s\n\n\n%s\n\n\n%s\n' % (name, ori, main))
 
         # Compile modified program
-        util.del_file('compilation2.txt')
-        try:
-            self.execute_compiler(
-                'python3 -m py_compile program.py 1> /dev/null 2> compilation2.txt')
-        except CompilationTooLong:
-            util.write_file('compilation1.txt', 'Compilation time exceeded')
+        if not python_syntax_ok('program.py', 'compilation2.txt'):
             return False
-        return util.file_size('compilation2.txt') == 0
+        self.write_bytecode()
+        return True
 
     def execute(self, tst):
         # under jutge-vinga, for some strange reason, python cannot locate the modules in the current dir, so we move them to a subdir under /tmp.
@@ -1667,19 +1779,19 @@ class Compiler_Python3(Compiler):
         wrk = '/tmp/' + tst + '.workdir.' + str(uuid.uuid4())[:8]
         util.del_dir(wrk)
         os.mkdir(wrk)
-        os.system('cp -r * ' + wrk)
+        self.copy_entries(ori, wrk)
         os.chdir(wrk)
+        pgm = 'program.pyc' if util.file_exists('program.pyc') else 'program.py'
         try:
-            self.execute_monitor(tst, '/usr/bin/python3 program.py')
+            self.execute_monitor(tst, '/usr/bin/python3 ' + pgm)
         except ExecutionError:
             logging.info('ExecutionError at execute_monitor')
-        os.system('cp -r * ' + ori)
+        self.copy_entries(wrk, ori)
         os.chdir(ori)
 
 
+@register
 class Compiler_MyPy(Compiler):
-    compilers.append('MyPy')
-
     def name(self):
         return 'Python3 Interpreter (with MyPy type checking)'
 
@@ -1716,58 +1828,41 @@ class Compiler_MyPy(Compiler):
 
     def compile_normal(self):
         # py_compile
-        util.del_file('compilation1.txt')
-        try:
-            self.execute_compiler(
-                'python3 -m py_compile program.py 1> /dev/null 2> compilation1.txt')
-        except CompilationTooLong:
-            util.write_file('compilation1.txt', 'Compilation time exceeded')
-            return False
-        if util.file_size('compilation1.txt') != 0:
+        if not python_syntax_ok('program.py', 'compilation1.txt'):
             return False
 
         # mypy
         try:
-            self.execute_compiler(
-                'mypy --no-error-summary --ignore-missing-imports --pretty --show-error-codes --show-column-numbers --show-error-context program.py > compilation1.txt')
+            self.execute_compiler_argv(
+                ['mypy', '--no-error-summary', '--ignore-missing-imports', '--pretty', '--show-error-codes',
+                 '--show-column-numbers', '--show-error-context', 'program.py'],
+                stdout='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             return False
         return util.file_size('compilation1.txt') == 0
 
     def compile_no_main(self):
-        util.del_file('compilation1.txt')
-        try:
-            self.execute_compiler(
-                'python3 -m py_compile program.py 1> /dev/null 2> compilation1.txt')
-        except CompilationTooLong:
-            util.write_file('compilation1.txt', 'Compilation time exceeded')
-            return False
-        if util.file_size('compilation1.txt') != 0:
+        if not python_syntax_ok('program.py', 'compilation1.txt'):
             return False
 
         # Modify the program
-        util.copy_file('program.py', 'original.py')
+        util.copy_source('program.py', 'original.py')
         ori = util.read_file('program.py')
-        main = util.read_file('../problem/main.py')
+        main = read_problem_file('../problem/main.py')
         name = '__name__ = "__jutge__"'
         util.write_file('program.py', '%s\n\n\n%s\n\n\n%s\n' % (name, ori, main))
 
         # Compile modified program
-        util.del_file('compilation2.txt')
-        try:
-            self.execute_compiler(
-                'python3 -m py_compile program.py 1> /dev/null 2> compilation2.txt')
-        except CompilationTooLong:
-            util.write_file('compilation2.txt', 'Compilation time exceeded')
-            return False
-        if util.file_size('compilation2.txt') != 0:
+        if not python_syntax_ok('program.py', 'compilation2.txt'):
             return False
 
         # check modified program
         try:
-            self.execute_compiler(
-                'mypy --no-error-summary --ignore-missing-imports --pretty --show-error-codes --show-column-numbers --show-error-context program.py > compilation2.txt')
+            self.execute_compiler_argv(
+                ['mypy', '--no-error-summary', '--ignore-missing-imports', '--pretty', '--show-error-codes',
+                 '--show-column-numbers', '--show-error-context', 'program.py'],
+                stdout='compilation2.txt')
         except CompilationTooLong:
             util.write_file('compilation2.txt', 'Compilation time exceeded')
             return False
@@ -1777,9 +1872,8 @@ class Compiler_MyPy(Compiler):
         self.execute_monitor_in_tmp(tst, '/usr/bin/python3 program.py')
 
 
+@register
 class Compiler_Codon(Compiler):
-    compilers.append('Codon')
-
     def name(self):
         return 'Codon'
 
@@ -1817,12 +1911,15 @@ class Compiler_Codon(Compiler):
     def compile_normal(self):
         util.del_file('compilation1.txt')
 
-        # hack to use yogi
+        # hack to use yogi (imported lazily, only Codon needs it)
+        import yogi
         shutil.copy(os.path.dirname(yogi.__file__) + '/yogi.codon', '.')
 #???        shutil.copy(os.path.dirname(yogi.__file__) + '/jutge.codon', '.')
 
         try:
-            self.execute_compiler('codon build -exe ' + self.flags1() + ' ' + 'program.codon > compilation1.txt 2>&1')
+            self.execute_compiler_argv(
+                ['codon', 'build', '-exe'] + self.flags1().split() + ['program.codon'],
+                stdout='compilation1.txt', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             return False
@@ -1834,7 +1931,8 @@ class Compiler_Codon(Compiler):
 
     def compile_no_main(self):
 
-        # hack to use yogi
+        # hack to use yogi (imported lazily, only Codon needs it)
+        import yogi
         shutil.copy(os.path.dirname(yogi.__file__) + '/yogi.codon', '.')
         #??? shutil.copy(os.path.dirname(yogi.__file__) + '/yogi.codon', './jutge.codon')
 
@@ -1851,14 +1949,16 @@ class Compiler_Codon(Compiler):
         # Modify the program
         util.copy_file('program.codon', 'original.codon')
         ori = util.read_file('program.codon')
-        main = util.read_file('../problem/main.py')
+        main = read_problem_file('../problem/main.py')
         name = '__name__ = "__jutge__"'
         util.write_file('program.codon', '%s\n\n\n%s\n\n\n%s\n' % (name, ori, main))
 
         # Compile modified program
         util.del_file('compilation2.txt')
         try:
-            self.execute_compiler('codon build -exe ' + self.flags1() + ' ' + 'program.codon > compilation2.txt 2>&1')
+            self.execute_compiler_argv(
+                ['codon', 'build', '-exe'] + self.flags1().split() + ['program.codon'],
+                stdout='compilation2.txt', stderr='compilation2.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             return False
@@ -1872,9 +1972,8 @@ class Compiler_Codon(Compiler):
         self.execute_monitor_in_tmp(tst, './program')
 
 
+@register
 class Compiler_Perl(Compiler):
-    compilers.append('Perl')
-
     def name(self):
         return 'Perl'
 
@@ -1903,9 +2002,10 @@ class Compiler_Perl(Compiler):
         return 'pl'
 
     def compile(self):
-        self.execute_compiler('perl -c ' + self.flags1() +
-                              ' program.pl 1> /dev/null 2> compilation1.txt')
-        if util.read_file('compilation1.txt').strip() != 'program.pl syntax OK':
+        _, err = self.execute_compiler_capture(
+            ['perl', '-c'] + self.flags1().split() + ['program.pl'])
+        if err.strip() != 'program.pl syntax OK':
+            util.write_file('compilation1.txt', err)
             return False
         util.del_file('compilation1.txt')
         return True
@@ -1914,9 +2014,8 @@ class Compiler_Perl(Compiler):
         self.execute_monitor(tst, ' /usr/bin/perl program.pl')
 
 
+@register
 class Compiler_Lua(Compiler):
-    compilers.append('Lua')
-
     def name(self):
         return 'Lua'
 
@@ -1946,17 +2045,18 @@ class Compiler_Lua(Compiler):
 
     def compile(self):
         util.del_file('program.luac')
-        self.execute_compiler('luac ' + self.flags1() +
-                              ' -o program.luac program.lua 1> /dev/null 2> compilation1.txt')
+        _, err = self.execute_compiler_capture(
+            ['luac'] + self.flags1().split() + ['-o', 'program.luac', 'program.lua'])
+        if err:
+            util.write_file('compilation1.txt', err)
         return util.file_exists('program.luac')
 
     def execute(self, tst):
         self.execute_monitor(tst, ' /usr/bin/lua program.luac')
 
 
+@register
 class Compiler_R(Compiler):
-    compilers.append('R')
-
     def name(self):
         return 'R'
 
@@ -1993,17 +2093,13 @@ class Compiler_R(Compiler):
     def compile_normal(self):
         util.del_file('compilation1.txt')
         try:
-            s = open("program.R").read()
-            util.copy_file("../driver/etc/R/wrapper.R", ".")
-            with open("wrapper.R", "r+") as f:
-                program = f.read()
-                f.seek(0)
-                program = program.replace('{s}', s)
-                f.write(program)
-                f.truncate()
-
-            util.copy_file("../driver/etc/R/compiler.R", ".")
-            self.execute_compiler('Rscript compiler.R 1> /dev/null 2> compilation1.txt')
+            # Build wrapper.R in memory from the cached template, one write
+            wrapper = read_problem_file('../driver/etc/R/wrapper.R')
+            util.write_file('wrapper.R', wrapper.replace('{s}', util.read_file('program.R')))
+            util.copy_file('../driver/etc/R/compiler.R', '.')
+            self.execute_compiler_argv(
+                ['Rscript', 'compiler.R'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             return False
@@ -2011,9 +2107,9 @@ class Compiler_R(Compiler):
 
     def compile_no_main(self):
         # Modify the program
-        util.copy_file('program.R', 'original.R')
+        util.copy_source('program.R', 'original.R')
         ori = util.read_file('program.R')
-        main = util.read_file('../problem/main.R')
+        main = read_problem_file('../problem/main.R')
         util.write_file('program.R', '%s\n\n\n%s\n' % (ori, main))
         return True
 
@@ -2022,9 +2118,8 @@ class Compiler_R(Compiler):
         self.execute_monitor(tst, ' --maxprocs=100 --maxfiles=500 /usr/bin/Rscript executer.R')
 
 
+@register
 class Compiler_Ruby(Compiler):
-    compilers.append('Ruby')
-
     def name(self):
         return 'Ruby'
 
@@ -2053,8 +2148,10 @@ class Compiler_Ruby(Compiler):
         return 'rb'
 
     def compile(self):
-        self.execute_compiler('ruby -c ' + self.flags1() + ' program.rb > compilation1.txt')
-        if util.read_file('compilation1.txt').strip() != 'Syntax OK':
+        out, _ = self.execute_compiler_capture(
+            ['ruby', '-c'] + self.flags1().split() + ['program.rb'])
+        if out.strip() != 'Syntax OK':
+            util.write_file('compilation1.txt', out)
             return False
         util.del_file('compilation1.txt')
         return True
@@ -2063,9 +2160,8 @@ class Compiler_Ruby(Compiler):
         self.execute_monitor_in_tmp(tst, ' --maxmem=256:128 /usr/bin/ruby program.rb')
 
 
+@register
 class Compiler_Guile(Compiler):
-    compilers.append('Guile')
-
     def name(self):
         return 'Guile'
 
@@ -2102,9 +2198,8 @@ class Compiler_Guile(Compiler):
         self.execute_monitor(tst, ' --maxfiles=7 /usr/bin/guile program.scm')
 
 
+@register
 class Compiler_Erlang(Compiler):
-    compilers.append('Erlang')
-
     def name(self):
         return 'Erlang'
 
@@ -2134,8 +2229,9 @@ class Compiler_Erlang(Compiler):
 
     def compile(self):
         util.del_file('program.beam')
-        self.execute_compiler('erlc ' + self.flags1() +
-                              ' program.erl 2> /dev/null 1> compilation1.txt')
+        self.execute_compiler_argv(
+            ['erlc'] + self.flags1().split() + ['program.erl'],
+            stdout='compilation1.txt', stderr='/dev/null')
         return util.file_exists('program.beam')
 
     def execute(self, tst):
@@ -2144,11 +2240,9 @@ class Compiler_Erlang(Compiler):
             tst, ' --maxfiles=30 -- /usr/bin/erl -noshell -s program start -s init stop')
 
 
+@register
 class Compiler_BEEF(Compiler):
     # Hack: copy program.bf to /tmp because otherwise we have permission
-
-    compilers.append('BEEF')
-
     def name(self):
         return 'Flexible Brainfuck interpreter'
 
@@ -2184,9 +2278,8 @@ class Compiler_BEEF(Compiler):
         self.execute_monitor(tst, ' /usr/bin/beef /tmp/program.bf')
 
 
+@register
 class Compiler_WS(Compiler):
-    compilers.append('WS')
-
     def name(self):
         return 'Whitespace interpreter'
 
@@ -2222,9 +2315,8 @@ class Compiler_WS(Compiler):
         self.execute_monitor(tst, ' /usr/bin/wspace program.ws')
 
 
+@register
 class Compiler_PHP(Compiler):
-    compilers.append('PHP')
-
     def name(self):
         return 'PHP'
 
@@ -2253,9 +2345,10 @@ class Compiler_PHP(Compiler):
         return 'php'
 
     def compile(self):
-        self.execute_compiler('php --syntax-check ' + self.flags1() +
-                              ' program.php > compilation1.txt')
-        if util.read_file('compilation1.txt').strip() != 'No syntax errors detected in program.php':
+        out, _ = self.execute_compiler_capture(
+            ['php', '--syntax-check'] + self.flags1().split() + ['program.php'])
+        if out.strip() != 'No syntax errors detected in program.php':
+            util.write_file('compilation1.txt', out)
             return False
         util.del_file('compilation1.txt')
         return True
@@ -2264,9 +2357,8 @@ class Compiler_PHP(Compiler):
         self.execute_monitor(tst, ' /usr/bin/php program.php')
 
 
+@register
 class Compiler_nodejs(Compiler):
-    compilers.append('nodejs')
-
     def name(self):
         return 'nodejs'
 
@@ -2295,14 +2387,17 @@ class Compiler_nodejs(Compiler):
         return 'js'
 
     def compile(self):
-        self.execute_compiler('node --check program.js 2> compilation1.txt')
+        self.execute_compiler_argv(
+            ['node', '--check', 'program.js'],
+            stderr='compilation1.txt')
         return util.file_size('compilation1.txt') == 0
 
     def execute(self, tst):
         #        self.execute_monitor(tst, ' --maxprocs=100 --maxmem=1024:1024 /usr/bin/node program.js')
 
-        cmd = '%s --basename=%s --maxprocs=100 --maxmem=2048:1024 -- /usr/bin/node program.js' \
-              % (monitor.path, tst)
+        argv = [monitor.path, '--basename=%s' % tst,
+                '--maxprocs=100', '--maxmem=2048:1024',
+                '--', '/usr/bin/node', 'program.js']
 
         # Execute the command and get its result code
         # Because JDK does not like to have its path blocked, the directory cannot be in
@@ -2311,28 +2406,25 @@ class Compiler_nodejs(Compiler):
         # move to tmp
         old = os.getcwd()
         tmp = util.tmp_dir()
-        os.system("mv * " + tmp)
+        self.move_entries(old, tmp)
         os.chdir(tmp)
         logging.info(tmp)
 
         # do work
-        logging.info(cmd)
-        pro = subprocess.Popen(cmd, shell=True, close_fds=True)
+        logging.info(' '.join(argv))
+        pro = subprocess.Popen(argv, close_fds=False)
         r = pro.wait()
-        if r > 256:
-            r = r / 256
 
         # move back from /tmp
-        os.system("mv * " + old)
+        self.move_entries(tmp, old)
         os.chdir(old)
 
         # exit
         if r != 0:
             raise ExecutionError
 
+@register
 class Compiler_Typescript(Compiler):
-    compilers.append('Typescript')
-
     def name(self):
         return 'Typescript (Bun)'
 
@@ -2363,7 +2455,9 @@ class Compiler_Typescript(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('/opt/bun/bin/bun build --compile program.ts 1> /dev/null 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['/opt/bun/bin/bun', 'build', '--compile', 'program.ts'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -2373,9 +2467,8 @@ class Compiler_Typescript(Compiler):
     def execute(self, tst):
         self.execute_monitor_in_tmp(tst, ' --maxprocs=100 --maxmem=2048:2048 ./program')
 
+@register
 class Compiler_Go(Compiler):
-    compilers.append('Go')
-
     def name(self):
         return 'Go'
 
@@ -2406,8 +2499,9 @@ class Compiler_Go(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('go build -o program.exe ' +
-                                  self.flags1() + ' program.go 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['go', 'build', '-o', 'program.exe'] + self.flags1().split() + ['program.go'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -2418,9 +2512,8 @@ class Compiler_Go(Compiler):
         self.execute_monitor(tst, ' --maxmem=1024:1024 --maxprocs=100 ./program.exe')
 
 
+@register
 class Compiler_CLISP(Compiler):
-    compilers.append('CLISP')
-
     def name(self):
         return 'GNU CLISP'
 
@@ -2451,8 +2544,10 @@ class Compiler_CLISP(Compiler):
     def compile(self):
         util.del_file('program.fas')
         try:
-            self.execute_compiler('clisp -c ' + self.flags1() +
-                                  ' program.lisp >/dev/null 2> compilation1.txt')
+            _, err = self.execute_compiler_capture(
+                ['clisp', '-c'] + self.flags1().split() + ['program.lisp'])
+            if err:
+                util.write_file('compilation1.txt', err)
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.fas')
@@ -2465,9 +2560,8 @@ class Compiler_CLISP(Compiler):
         self.execute_monitor_in_tmp(tst, ' --maxfiles=8 /usr/bin/clisp program.fas')
 
 
+@register
 class Compiler_Verilog(Compiler):
-    compilers.append('Verilog')
-
     def name(self):
         return 'Icarus Verilog'
 
@@ -2497,17 +2591,18 @@ class Compiler_Verilog(Compiler):
 
     def compile(self):
         util.del_file('program.vvp')
-        self.execute_compiler('/usr/local/bin/iverilog-0.8 -o program.vvp ' +
-                              self.flags1() + ' program.v 2> compilation1.txt')
+        _, err = self.execute_compiler_capture(
+            ['/usr/local/bin/iverilog-0.8', '-o', 'program.vvp'] + self.flags1().split() + ['program.v'])
+        if err:
+            util.write_file('compilation1.txt', err)
         return util.file_exists('program.vvp')
 
     def execute(self, tst):
         self.execute_monitor(tst, ' /usr/local/bin/vvp-0.8 program.vvp')
 
 
+@register
 class Compiler_PRO2(Compiler):
-    compilers.append('PRO2')
-
     def name(self):
         return 'PRO2 - GNU C++ Compiler'
 
@@ -2536,86 +2631,64 @@ class Compiler_PRO2(Compiler):
         return 'cc'
 
     def compile(self):
-        # first compilation
+        # The strict validation pass and the instrumented build share only
+        # the sources, so they run in parallel in sibling directories
         util.del_file('program.exe')
-        util.del_dir("program.dir")
-        os.mkdir("program.dir")
-        os.chdir("program.dir")
         try:
-            if util.file_exists('../../problem/public.tar'):
-                os.system('tar xf ../../problem/public.tar')
-            if util.file_exists('../../problem/private.tar'):
-                os.system('tar xf ../../problem/private.tar')
-
-            if util.file_exists('../../problem/solution.cc'):
-                util.copy_file('../program.cc', 'program.cc')
-            elif util.file_exists('../../problem/solution.hh'):
-                util.copy_file('../program.cc', 'program.hh')
-
-            self.execute_compiler(
-                # compte que abaix esta repetit!!!
-                'g++ ' + self.flags1() + ' *.cc -o ../program.exe 2> ../compilation1.txt'
-            )
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+                fut1 = pool.submit(self.compile_pass, 'program.dir1',
+                                   self.flags1(), 'compilation1.txt', False)
+                fut2 = pool.submit(self.compile_pass, 'program.dir2',
+                                   self.flags2(), 'compilation2.txt', True)
+                ok1 = fut1.result()
+                ok2 = fut2.result()
         except CompilationTooLong:
-            os.chdir('..')
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
             return False
-        os.chdir('..')
-        if not util.file_exists('program.exe'):
+        if not ok1 or not ok2:
             return False
+        util.move_file('program.dir2/program.exe', 'program.exe')
+        return True
 
-        # second compilation
-        util.del_file('program.exe')
-        util.del_dir("program.dir")
-        os.mkdir("program.dir")
-        os.chdir("program.dir")
-
-        try:
-            if util.file_exists('../../problem/public.tar'):
-                os.system('tar xf ../../problem/public.tar')
-            if util.file_exists('../../problem/private.tar'):
-                os.system('tar xf ../../problem/private.tar')
-
-            headers = ''
-            if util.file_exists('../../problem/solution.cc'):
-                util.copy_file('../program.cc', 'program.cc')
-            elif util.file_exists('../../problem/solution.hh'):
-                util.copy_file('../program.cc', 'program.hh')
-
+    def compile_pass(self, drt, flags, log, wrapped):
+        """Runs one g++ pass over the problem sources in the sibling
+        directory drt and tells whether drt/program.exe came out. The
+        wrapped pass builds the stub-instrumented program."""
+        util.del_dir(drt)
+        os.mkdir(drt)
+        if util.file_exists_cached('../problem/public.tar'):
+            util.extract_tar('../problem/public.tar', drt)
+        if util.file_exists_cached('../problem/private.tar'):
+            util.extract_tar('../problem/private.tar', drt)
+
+        if util.file_exists_cached('../problem/solution.cc'):
+            util.copy_source('program.cc', drt + '/program.cc')
+        elif util.file_exists_cached('../problem/solution.hh'):
+            util.copy_source('program.cc', drt + '/program.hh')
+
+        if wrapped:
             # Modify the program
             try:
-                original = util.read_file('program.cc')
+                original = util.read_file(drt + '/program.cc')
             except Exception:
                 original = ''
-            stub = util.read_file('../../driver/etc/cc/stub.cc')
-            util.copy_file("../../driver/etc/cc/normal.cc", "./program.cc")
-            with open("program.cc", "r+") as f:
-                program = f.read()
-                f.seek(0)
-                program = program.replace('{original}', original)
-                program = program.replace('{stub}', stub)
-                f.write(program)
-                f.truncate()
+            stub = read_problem_file('../driver/etc/cc/stub.cc')
+            program = read_problem_file('../driver/etc/cc/normal.cc')
+            program = program.replace('{original}', original)
+            program = program.replace('{stub}', stub)
+            util.write_file(drt + '/program.cc', program)
 
-            self.execute_compiler(
-                'g++ ' + self.flags2() + ' *.cc -o ../program.exe 2> ../compilation2.txt'
-            )
-        except CompilationTooLong:
-            os.chdir('..')
-            util.write_file('compilation1.txt', 'Compilation time exceeded')
-            util.del_file('program.exe')
-            return False
-        os.chdir('..')
-        return util.file_exists('program.exe')
+        self.execute_compiler(
+            'g++ -s ' + flags + ' *.cc -o program.exe 2> ../' + log, cwd=drt)
+        return util.file_exists(drt + '/program.exe')
 
     def execute(self, tst):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_MakePRO2(Compiler):
-    compilers.append('MakePRO2')
-
     def name(self):
         return 'Make for PRO2'
 
@@ -2660,22 +2733,30 @@ class Compiler_MakePRO2(Compiler):
             os.chdir('..')
             return False
 
-        typ = subprocess.getoutput('file -b ../program.tar')
-        if typ != "POSIX tar archive (GNU)" and typ != "POSIX tar archive":
+        if not util.is_tar('../program.tar'):
+            util.write_file("../compilation1.txt",
+                            "Submission is not a tar archive")
+            os.chdir('..')
+            return False
+
+        try:
+            util.extract_tar('../program.tar', '.')
+        except tarfile.TarError:
+            # extract_tar refuses members that would escape the directory
             util.write_file("../compilation1.txt",
-                            "Submission is not a tar archive (identification: '%s')" % typ)
+                            "Submission is not a valid tar archive")
             os.chdir('..')
             return False
 
         try:
-            os.system('tar xf ../program.tar')
-            if util.file_exists('../../problem/public.tar'):
-                os.system('tar xf ../../problem/public.tar')
-            if util.file_exists('../../problem/private.tar'):
-                os.system('tar xf ../../problem/private.tar')
+            if util.file_exists_cached('../../problem/public.tar'):
+                util.extract_tar('../../problem/public.tar', '.')
+            if util.file_exists_cached('../../problem/private.tar'):
+                util.extract_tar('../../problem/private.tar', '.')
 
             logging.info('MakePRO2 cleaning')
-            os.system('rm -rf *.exe *.o')
+            for p in glob.glob('*.exe') + glob.glob('*.o'):
+                util.del_file(p)
             self.execute_compiler(
                 'make program.exe 1> make.log 2> compilation1.txt'
             )
@@ -2700,9 +2781,8 @@ class Compiler_MakePRO2(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_Rust(Compiler):
-    compilers.append('Rust')
-
     def name(self):
         return 'Rust'
 
@@ -2733,8 +2813,9 @@ class Compiler_Rust(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('rustc -o program.exe ' +
-                                  self.flags1() + ' program.rs 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['rustc', '-o', 'program.exe'] + self.flags1().split() + ['program.rs'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -2745,9 +2826,8 @@ class Compiler_Rust(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_Crystal(Compiler):
-    compilers.append('Crystal')
-
     def name(self):
         return 'Crystal'
 
@@ -2778,8 +2858,9 @@ class Compiler_Crystal(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('crystal build -o program.exe ' +
-                                  self.flags1() + ' program.cr 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['crystal', 'build', '-o', 'program.exe'] + self.flags1().split() + ['program.cr'],
+                stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -2790,9 +2871,8 @@ class Compiler_Crystal(Compiler):
         self.execute_monitor_in_tmp(tst, './program.exe')
 
 
+@register
 class Compiler_Nim(Compiler):
-    compilers.append('Nim')
-
     def name(self):
         return 'Nim'
 
@@ -2823,8 +2903,9 @@ class Compiler_Nim(Compiler):
     def compile(self):
         util.del_file('program.exe')
         try:
-            self.execute_compiler('nim c -o:program.exe ' +
-                                  self.flags1() + ' program.nim 1> /dev/null 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['nim', 'c', '-o:program.exe'] + self.flags1().split() + ['program.nim'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program.exe')
@@ -2836,9 +2917,8 @@ class Compiler_Nim(Compiler):
         self.execute_monitor(tst, './program.exe')
 
 
+@register
 class Compiler_Julia(Compiler):
-    compilers.append('Julia')
-
     def name(self):
         return 'Julia'
 
@@ -2873,9 +2953,8 @@ class Compiler_Julia(Compiler):
         self.execute_monitor_in_tmp(tst, ' --maxprocs=32 --maxmem=2048:256 -- /bin/bash -c "HOME=/tmp /usr/bin/julia program.jl"')
 
 
+@register
 class Compiler_Kotlin(Compiler):
-    compilers.append('Kotlin')
-
     def name(self):
         return 'Kotlin'
 
@@ -2904,12 +2983,15 @@ class Compiler_Kotlin(Compiler):
         return 'kt'
 
     def compile(self):
-        for f in glob.glob('*.class'):
-            util.del_file(f)
+        with os.scandir('.') as it:
+            for e in it:
+                if e.name.endswith('.class'):
+                    os.unlink(e.path)
         util.del_file('program.jar')
         try:
-            self.execute_compiler('kotlinc ' +
-                                  self.flags1() + ' program.kt -d program.jar -include-runtime > compilation1.txt')
+            self.execute_compiler_argv(
+                ['kotlinc'] + self.flags1().split() + ['program.kt', '-d', 'program.jar', '-include-runtime'],
+                stdout='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             return False
@@ -2917,11 +2999,7 @@ class Compiler_Kotlin(Compiler):
         return util.file_exists('program.jar')
 
     def execute(self, tst):
-        ops = ''
-        if util.file_exists(tst + '.ops'):
-            ops += ' ' + util.read_file(tst + '.ops').replace('\n', ' ')
-        if util.file_exists(tst + '.JDK.ops'):
-            ops += ' ' + util.read_file(tst + '.JDK.ops').replace('\n', ' ')
+        ops = read_optional(tst + '.ops') + read_optional(tst + '.JDK.ops')
 
         # Prepare the command
         opsMonitor = '--maxprocs=100 --maxtime=10 --maxprocs=4096 --maxmem=2048:2048'
@@ -2938,16 +3016,14 @@ class Compiler_Kotlin(Compiler):
         # move to tmp
         old = os.getcwd()
         tmp = util.tmp_dir()
-        os.system("mv * " + tmp)
+        self.move_entries(old, tmp)
         os.chdir(tmp)
 
         pro = subprocess.Popen(cmd, shell=True, close_fds=True)
         r = pro.wait()
-        if r > 256:
-            r /= 256
 
         # move back from /tmp
-        os.system("mv * " + old)
+        self.move_entries(tmp, old)
         os.chdir(old)
 
 
@@ -2955,9 +3031,8 @@ class Compiler_Kotlin(Compiler):
             raise ExecutionError
 
 
+@register
 class Compiler_Zig(Compiler):
-    compilers.append('Zig')
-
     def name(self):
         return 'Zig'
 
@@ -2988,8 +3063,9 @@ class Compiler_Zig(Compiler):
     def compile(self):
         util.del_file('program')
         try:
-            self.execute_compiler('zig build-exe -femit-bin=./z' +
-                                  self.flags1() + ' program.zig 1> /dev/null 2> compilation1.txt')
+            self.execute_compiler_argv(
+                ['zig', 'build-exe'] + ('-femit-bin=./z' + self.flags1()).split() + ['program.zig'],
+                stdout='/dev/null', stderr='compilation1.txt')
         except CompilationTooLong:
             util.write_file('compilation1.txt', 'Compilation time exceeded')
             util.del_file('program')
@@ -3004,8 +3080,7 @@ class Compiler_Zig(Compiler):
 def compiler(cpl, handler=None):
     """Returns a compiler for cpl."""
 
-    cpl = cpl.replace('++', 'XX')
-    return eval('Compiler_%s(handler)' % cpl)
+    return COMPILERS[cpl.replace('++', 'XX')](handler)
 
 
 def info(compiler_id):
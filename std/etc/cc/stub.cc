@@ -14,9 +14,9 @@
         // we have an exception
         try {
             std::rethrow_exception(exc); // throw to recognize the type
-        } catch (std::bad_alloc& exc) {
+        } catch (std::bad_alloc&) {
             raise(SIGUSR1);
-        } catch (std::exception& exc) {
+        } catch (std::exception&) {
             raise(SIGUSR2);
         } catch (...) {
             raise(SIGUSR2);
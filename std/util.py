@@ -6,6 +6,7 @@ import logging
 import os
 import shutil
 import socket
+import subprocess
 import sys
 import tarfile
 import tempfile
@@ -14,6 +15,12 @@ import chardet
 
 import yaml
 
+try:
+    # libyaml-backed implementations, several times faster
+    from yaml import CDumper as YamlDumper, CFullLoader as YamlLoader
+except ImportError:
+    from yaml import Dumper as YamlDumper, FullLoader as YamlLoader
+
 
 # ----------------------------------------------------------------------------
 # Logging
@@ -58,26 +65,40 @@ def intersection(a, b):
 
 def read_file(name):
     """Returns a string with the contents of the file name."""
+    data = read_bytes(name)
     try:
-        fd = open(name, 'r')
-        r = fd.read()
-        fd.close()
-    except Exception:
-        fd = open(name, 'rb')
-        char_detection = chardet.detect(fd.read())
-        fd.close()
+        r = data.decode('utf-8')
+    except UnicodeDecodeError:
+        char_detection = chardet.detect(data)
+        r = data.decode(char_detection['encoding'] or 'utf-8', errors='ignore')
+    # same newline translation the old text-mode open performed
+    return r.replace('\r\n', '\n').replace('\r', '\n')
+
 
-        f = open(name, encoding=char_detection['encoding'], errors='ignore')
-        r = f.read()
-        f.close()
-    return r
+def read_bytes(name):
+    """Returns a bytes object with the contents of the file name."""
+    fd = os.open(name, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 1 << 20)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return chunks[0] if len(chunks) == 1 else b''.join(chunks)
 
 
 def write_file(name, txt=""):
     """Writes the file name with contents txt."""
-    f = open(name, "w")
-    f.write(txt)
-    f.close()
+    data = txt.encode('utf-8') if isinstance(txt, str) else txt
+    fd = os.open(name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
 
 
 def del_file(name):
@@ -108,11 +129,30 @@ def file_exists(name):
     return os.path.exists(name)
 
 
+_exists_cache = {}
+
+
+def file_exists_cached(name):
+    """As file_exists, for paths that do not change during a run (e.g.
+    problem files): the answer is remembered per absolute path."""
+    path = os.path.abspath(name)
+    hit = _exists_cache.get(path)
+    if hit is None:
+        hit = _exists_cache[path] = os.path.exists(path)
+    return hit
+
+
 def copy_file(src, dst):
     """Copies a file from src to dst."""
     shutil.copy(src, dst)
 
 
+def copy_source(src, dst):
+    """Copies file contents from src to dst without the permission bits.
+    Takes the in-kernel fast path; not for executables."""
+    shutil.copyfile(src, dst)
+
+
 def move_file(src, dst):
     """Recursively move a file or directory to another location."""
     shutil.move(src, dst)
@@ -124,16 +164,17 @@ def move_file(src, dst):
 
 
 def print_yml(inf):
-    print(yaml.dump(inf, indent=4, width=1000, default_flow_style=False))
+    print(yaml.dump(inf, Dumper=YamlDumper, indent=4,
+                    width=1000, default_flow_style=False))
 
 
 def write_yml(path, inf):
-    yaml.dump(inf, open(path, "w"), indent=4,
+    yaml.dump(inf, open(path, "w"), Dumper=YamlDumper, indent=4,
               width=1000, default_flow_style=False)
 
 
 def read_yml(path):
-    return yaml.load(open(path, 'r'), Loader=yaml.FullLoader)
+    return yaml.load(open(path, 'r'), Loader=YamlLoader)
 
 
 # ----------------------------------------------------------------------------
@@ -141,13 +182,24 @@ def read_yml(path):
 # ----------------------------------------------------------------------------
 
 
+# pigz compresses with all the cores, gzip-compatible
+_pigz = shutil.which('pigz')
+
+
 def create_tgz(name, filenames, path=None):
     """Creates a tgz file name with the contents given in the list of filenames.
     Uses path if given."""
+    pro = None
     if name == "-":
         tar = tarfile.open(mode="w|gz", fileobj=sys.stdout)
+    elif _pigz:
+        out = open(name, "wb")
+        pro = subprocess.Popen([_pigz, "-c"], stdin=subprocess.PIPE, stdout=out)
+        out.close()
+        tar = tarfile.open(mode="w|", fileobj=pro.stdin)
     else:
         tar = tarfile.open(name, "w:gz")
+    tar.copybufsize = 1 << 20  # copy members in 1 MiB chunks, not 16 KiB
     cwd = os.getcwd()
     if path:
         os.chdir(path)
@@ -156,6 +208,30 @@ def create_tgz(name, filenames, path=None):
     if path:
         os.chdir(cwd)
     tar.close()
+    if pro:
+        pro.stdin.close()
+        pro.wait()
+
+
+def is_tar(name):
+    """Tells whether file name looks like a POSIX tar archive, by its
+    magic bytes (cheaper than shelling out to file(1))."""
+    try:
+        with open(name, 'rb') as f:
+            block = f.read(265)
+    except OSError:
+        return False
+    return block[257:262] == b'ustar'
+
+
+def extract_tar(name, path):
+    """Extracts a tar file in the given path."""
+    tar = tarfile.open(name)
+    tar.copybufsize = 1 << 20
+    # archives may come from submissions: refuse members that would
+    # escape path (absolute names, '..', devices, ...)
+    tar.extractall(path, filter='data')
+    tar.close()
 
 
 def extract_tgz(name, path):
@@ -164,8 +240,8 @@ def extract_tgz(name, path):
         tar = tarfile.open(mode="r|gz", fileobj=sys.stdin)
     else:
         tar = tarfile.open(name, "r:gz")
-    for x in tar:
-        tar.extract(x, path)
+    tar.copybufsize = 1 << 20
+    tar.extractall(path, filter='data')
     tar.close()
 
 